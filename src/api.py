@@ -1,43 +1,102 @@
+import json
+import os
 import random
+import socket
 import threading
 import time
+from dataclasses import fields
 
-import requests
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-}
-
-URLS = [
-    "https://v2.xxapi.cn/api/meinv?return=302",
-    "https://api.jkyai.top/API/jxhssp.php",
-    "https://api.jkyai.top/API/jxbssp.php",
-]
+from feed_config import FEED_SOCKET_PATH, socket_trusted
+from mp4probe import VideoMeta, probe_mp4
+from provider import FETCH_TIMEOUT, fetch_new_video_url, insert_prefetched
+from provider import HEADERS, URLS  # 兼容导出：两者原先定义在本模块
 
 # 全局视频缓存与当前位置索引
 _VIDEO_CACHE: list[str] = []
 _CURRENT_INDEX: int = -1
 _LOCK = threading.RLock()
 
+# 每个缓存视频的元数据（由预取线程通过 Range 请求探测），以URL为键
+_VIDEO_META: dict[str, VideoMeta] = {}
+_DEFERRED: dict[str, int] = {}  # 起播慢的视频被推后的次数
+
 # 预取设置
 _PREFETCH_AHEAD: int = 10  # 静默缓存后面N个
 _RUN_PREFETCH = False
 _PREFETCH_THREAD: threading.Thread | None = None
 
+# 共享预取守护进程（可选，见 feed_daemon.py）
+_CLIENT_ID: str = f"{socket.gethostname()}-{os.getpid()}"
+_DAEMON_CONNECT_TIMEOUT: float = 0.5
+_DAEMON_TIMEOUT: float = 1.0  # ping/state/prev/refresh 只查内存，在GUI线程上调用，超时要短
+# next 缓存不足时守护进程需要现拉一个（总时长不超过 FETCH_TIMEOUT），再留出余量
+_DAEMON_NEXT_TIMEOUT: float = FETCH_TIMEOUT + 4.0
+
+
+class FeedDaemonError(RuntimeError):
+    """共享预取守护进程已连接，但请求失败（返回错误、超时或响应无效）。"""
 
-def _fetch_new_video_url() -> str:
-    """从接口获取一个新的直链播放地址。"""
-    resp = requests.get(URLS[0], headers=HEADERS, allow_redirects=True)
-    return resp.url
+
+def _remember_meta(url: str | None, meta: dict | None) -> None:
+    """记录守护进程返回的元数据；只取本版本认识的字段，兼容版本不同的守护进程。"""
+    if url and meta and isinstance(meta, dict):
+        known = {f.name for f in fields(VideoMeta)}
+        with _LOCK:
+            _VIDEO_META[url] = VideoMeta(**{k: v for k, v in meta.items() if k in known})
+
+
+def _daemon_request(op: str) -> dict | None:
+    """向共享预取守护进程发送一条请求。
+    守护进程未运行（无法连接，或套接字不属于当前用户）时返回None，由调用方回退到进程内模式；
+    已连接但请求失败时抛出 FeedDaemonError，不回退，以免每个播放器都去请求接口。
+    """
+    if not hasattr(socket, "AF_UNIX") or not socket_trusted(FEED_SOCKET_PATH):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(_DAEMON_CONNECT_TIMEOUT)
+        try:
+            sock.connect(FEED_SOCKET_PATH)
+        except OSError:
+            return None
+        try:
+            sock.settimeout(_DAEMON_NEXT_TIMEOUT if op == "next" else _DAEMON_TIMEOUT)
+            payload = json.dumps({"op": op, "client": _CLIENT_ID}) + "\n"
+            sock.sendall(payload.encode("utf-8"))
+            with sock.makefile("rb") as f:
+                line = f.readline()
+            resp = json.loads(line)
+        except (OSError, ValueError) as e:
+            raise FeedDaemonError(f"共享预取守护进程请求失败: {e}") from e
+    if not isinstance(resp, dict) or not resp.get("ok"):
+        error = resp.get("error") if isinstance(resp, dict) else resp
+        raise FeedDaemonError(f"共享预取守护进程返回错误: {error}")
+    return resp
+
+
+def daemon_available() -> bool:
+    """共享预取守护进程是否在运行（能连上即视为在运行，即使本次请求失败）。"""
+    try:
+        return _daemon_request("ping") is not None
+    except FeedDaemonError:
+        return True
 
 
 def get_next_video_url() -> str:
     """获取下一个视频地址。
     - 如果缓存中已有下一个，则直接返回；
     - 否则拉取新地址，写入缓存，再返回。
+    若共享预取守护进程在运行，则由守护进程提供（按本进程的游标），
+    守护进程请求失败时抛出 FeedDaemonError。
     返回值：视频URL
     """
     global _CURRENT_INDEX, _VIDEO_CACHE
+    resp = _daemon_request("next")
+    if resp is not None:
+        _remember_meta(resp["url"], resp.get("meta"))
+        # 预取线程在守护进程模式下会定期 ping，让守护进程保留本进程的游标
+        _kick_prefetch()
+        return resp["url"]
+
     # 先尝试走缓存
     with _LOCK:
         if _CURRENT_INDEX + 1 < len(_VIDEO_CACHE):
@@ -48,7 +107,7 @@ def get_next_video_url() -> str:
             return url
 
     # 缓存没有，拉取一个新视频（网络请求不持锁）
-    url = _fetch_new_video_url()
+    url = fetch_new_video_url()
     with _LOCK:
         _VIDEO_CACHE.append(url)
         _CURRENT_INDEX = len(_VIDEO_CACHE) - 1
@@ -60,6 +119,10 @@ def get_next_video_url() -> str:
 def get_prev_video_url() -> str | None:
     """获取上一个视频地址；若没有上一个则返回None。"""
     global _CURRENT_INDEX
+    resp = _daemon_request("prev")
+    if resp is not None:
+        _remember_meta(resp.get("url"), resp.get("meta"))
+        return resp.get("url")
     with _LOCK:
         if _CURRENT_INDEX > 0:
             _CURRENT_INDEX -= 1
@@ -73,16 +136,30 @@ def refresh_videos() -> None:
     with _LOCK:
         _VIDEO_CACHE = []
         _CURRENT_INDEX = -1
+        _VIDEO_META.clear()
+        _DEFERRED.clear()
+    # 守护进程模式下只重置本进程的游标，由守护进程负责预取
+    if _daemon_request("refresh") is not None:
+        return
     # 刷新后继续预取
     _kick_prefetch()
 
 
 def get_cache_state() -> tuple[int, int]:
     """返回 (当前索引(从0开始), 缓存总数)。若尚未加载任何视频，则返回 (-1, 0)。"""
+    resp = _daemon_request("state")
+    if resp is not None:
+        return resp["index"], resp["total"]
     with _LOCK:
         return _CURRENT_INDEX, len(_VIDEO_CACHE)
 
 
+def get_video_meta(url: str) -> VideoMeta | None:
+    """返回视频的元数据（时长、分辨率、码率、大小、是否 faststart）；尚未探测到时返回None。"""
+    with _LOCK:
+        return _VIDEO_META.get(url)
+
+
 # 兼容旧接口名（如被其他地方引用）
 def get_beauty_video() -> str:
     return get_next_video_url()
@@ -94,6 +171,11 @@ def _prefetch_loop() -> None:
     global _RUN_PREFETCH
     while _RUN_PREFETCH:
         try:
+            # 共享预取守护进程在运行时由它负责预取，本进程不再请求接口（ping 同时起到保活作用）
+            if daemon_available():
+                time.sleep(2.0)
+                continue
+
             # 计算还差多少个
             with _LOCK:
                 ahead = len(_VIDEO_CACHE) - (_CURRENT_INDEX + 1)
@@ -102,9 +184,13 @@ def _prefetch_loop() -> None:
                 continue
 
             # 一次只补一个，避免请求过快
-            url = _fetch_new_video_url()
+            url = fetch_new_video_url()
+            # 只读 box 头探测元数据，用于排序与界面显示时长
+            meta = probe_mp4(url, HEADERS)
             with _LOCK:
-                _VIDEO_CACHE.append(url)
+                if meta is not None:
+                    _VIDEO_META[url] = meta
+                insert_prefetched(_VIDEO_CACHE, _VIDEO_META, _DEFERRED, url, _CURRENT_INDEX + 1)
             # 小憩，避免打爆接口
             time.sleep(0.2)
         except Exception:
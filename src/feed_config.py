@@ -0,0 +1,41 @@
+"""
+共享预取守护进程的配置，播放器（api.py）与守护进程（feed_daemon.py）共用。
+"""
+
+import os
+import tempfile
+
+
+def _runtime_dir() -> str:
+    """当前用户私有的运行时目录：优先 $XDG_RUNTIME_DIR，否则为临时目录下以 uid 命名的子目录。"""
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.environ["XDG_RUNTIME_DIR"]
+    if hasattr(os, "getuid"):
+        return os.path.join(tempfile.gettempdir(), f"beauty_tok-{os.getuid()}")
+    return tempfile.gettempdir()
+
+
+# 守护进程监听的 Unix 域套接字，可通过环境变量 BEAUTY_TOK_FEED_SOCK 修改
+FEED_SOCKET_PATH: str = os.environ.get("BEAUTY_TOK_FEED_SOCK") or os.path.join(
+    _runtime_dir(), "beauty_tok_feed.sock"
+)
+
+
+def ensure_socket_dir(path: str) -> None:
+    """守护进程启动前调用：创建套接字所在目录（0700），并确认只有当前用户能写入。"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    st = os.stat(directory)
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise RuntimeError(f"套接字目录不属于当前用户或可被他人写入: {directory}")
+
+
+def socket_trusted(path: str) -> bool:
+    """套接字是否存在且属于当前用户，避免连上其他用户伪造的守护进程。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return not hasattr(os, "getuid") or st.st_uid == os.getuid()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享预取守护进程
+
+同一台机器上运行多个播放器时，每个进程各自预取会成倍增加接口请求。
+本守护进程统一持有预取线程和视频缓存，通过 Unix 域套接字向各播放器提供视频地址，
+每个客户端（播放器进程）拥有独立的游标。
+
+api.py 在检测到守护进程运行时会自动使用它，否则回退到进程内预取。
+
+用法：
+    python src/feed_daemon.py [--ahead 10] [--socket $XDG_RUNTIME_DIR/beauty_tok_feed.sock]
+
+协议：每个连接发送一行 JSON 请求 {"op": ..., "client": ...}，返回一行 JSON 响应。
+    op: ping | next | prev | refresh | state
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import asdict
+
+from feed_config import FEED_SOCKET_PATH, ensure_socket_dir
+from mp4probe import VideoMeta, probe_mp4
+from provider import HEADERS, fetch_new_video_url, insert_prefetched
+
+
+_IDLE_TIMEOUT = 600.0  # 客户端超过该时间（秒）无请求（含 ping）则丢弃其游标
+
+
+class _ClientCursor:
+    """单个客户端的游标（均为绝对位置，不随缓存裁剪变化）：
+    base 为本客户端可见的起点（刷新后前移），index 为当前位置，last_seen 为最近一次请求的时间。"""
+
+    def __init__(self, base: int):
+        self.base = base
+        self.index = base - 1
+        self.last_seen = time.monotonic()
+
+
+class FeedDaemon:
+    """共享的视频缓存、预取线程与各客户端游标。
+
+    缓存中第 i 项的绝对位置为 i + _offset；所有客户端都不再可见的开头部分会被裁掉。
+    """
+
+    def __init__(self, ahead: int = 10):
+        self.ahead = ahead
+        self._cache: list[str] = []
+        self._offset = 0  # 已裁掉的条目数
+        self._high = -1  # 所有客户端到过的最远绝对位置
+        self._cursors: dict[str, _ClientCursor] = {}
+        self._meta: dict[str, VideoMeta] = {}
+        self._deferred: dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._running = False
+        self._thread: threading.Thread | None = None
+
+    # ========== 游标操作 ==========
+    def _end(self) -> int:
+        """缓存末尾之后的绝对位置。"""
+        return self._offset + len(self._cache)
+
+    def _cursor(self, client: str) -> _ClientCursor:
+        """获取客户端游标；新客户端从尚未被任何客户端看过的位置开始。"""
+        cursor = self._cursors.get(client)
+        if cursor is None:
+            cursor = _ClientCursor(self._high + 1)
+            self._cursors[client] = cursor
+        cursor.last_seen = time.monotonic()
+        return cursor
+
+    def _video(self, url: str | None) -> dict:
+        meta = self._meta.get(url) if url else None
+        return {"url": url, "meta": asdict(meta) if meta else None}
+
+    def _move(self, client: str, index: int):
+        """移动游标，返回回复未能发出时用来撤销的回调，避免客户端没收到的视频被跳过。"""
+        cursor = self._cursor(client)
+        old = cursor.index
+        cursor.index = index
+        self._high = max(self._high, index)
+
+        def undo():
+            with self._lock:
+                if self._cursors.get(client) is cursor and cursor.index == index:
+                    cursor.index = old
+
+        return undo
+
+    def next(self, client: str):
+        with self._lock:
+            cursor = self._cursor(client)
+            index = cursor.index + 1
+            if index < self._end():
+                return self._video(self._cache[index - self._offset]), self._move(client, index)
+
+        # 缓存没有，现拉一个（网络请求不持锁）
+        url = fetch_new_video_url()
+        with self._lock:
+            self._cache.append(url)
+            index = self._end() - 1
+            return self._video(url), self._move(client, index)
+
+    def prev(self, client: str):
+        with self._lock:
+            cursor = self._cursor(client)
+            index = cursor.index - 1
+            if index >= max(cursor.base, self._offset):
+                return self._video(self._cache[index - self._offset]), self._move(client, index)
+            return self._video(None), None
+
+    def refresh(self, client: str):
+        """只重置该客户端：跳到未看过的位置，不影响其他客户端。"""
+        with self._lock:
+            self._cursors[client] = _ClientCursor(self._high + 1)
+        return {}, None
+
+    def state(self, client: str):
+        """返回与 api.get_cache_state 相同含义的 (index, total)，以客户端起点为 0。"""
+        with self._lock:
+            cursor = self._cursor(client)
+            base = max(cursor.base, self._offset)
+            return {"index": cursor.index - base, "total": self._end() - base}, None
+
+    def handle(self, request: dict):
+        """处理一条请求，返回 (响应, 回复未能发出时执行的撤销回调或None)。"""
+        op = request.get("op")
+        client = str(request.get("client") or "")
+        if op == "ping":
+            # 播放器后台定期 ping，停在同一个视频上时也不会被当作空闲而丢掉游标
+            with self._lock:
+                cursor = self._cursors.get(client)
+                if cursor is not None:
+                    cursor.last_seen = time.monotonic()
+            return {"ok": True}, None
+        if op not in ("next", "prev", "refresh", "state") or not client:
+            return {"ok": False, "error": f"bad request: {request!r}"}, None
+        try:
+            resp, undo = getattr(self, op)(client)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}, None
+        resp["ok"] = True
+        return resp, undo
+
+    def _prune(self) -> None:
+        """丢弃空闲客户端的游标，并裁掉所有客户端都不再可见的缓存及其元数据。"""
+        with self._lock:
+            now = time.monotonic()
+            for client, cursor in list(self._cursors.items()):
+                if now - cursor.last_seen > _IDLE_TIMEOUT:
+                    del self._cursors[client]
+
+            low = min((c.base for c in self._cursors.values()), default=self._high + 1)
+            count = min(low, self._end()) - self._offset
+            if count <= 0:
+                return
+            dropped = self._cache[:count]
+            del self._cache[:count]
+            self._offset += count
+            remaining = set(self._cache)
+            for url in dropped:
+                if url not in remaining:
+                    self._meta.pop(url, None)
+                    self._deferred.pop(url, None)
+
+    # ========== 预取实现 ==========
+    def _prefetch_loop(self) -> None:
+        """后台线程：保证最靠前的客户端之后至少有 ahead 个缓存。"""
+        while self._running:
+            try:
+                self._prune()
+                with self._lock:
+                    ahead = self._end() - (self._high + 1)
+                if ahead >= self.ahead:
+                    time.sleep(0.3)
+                    continue
+
+                url = fetch_new_video_url()
+                meta = probe_mp4(url, HEADERS)
+                with self._lock:
+                    if meta is not None:
+                        self._meta[url] = meta
+                    insert_prefetched(
+                        self._cache, self._meta, self._deferred, url, max(self._high + 1 - self._offset, 0)
+                    )
+                time.sleep(0.2)
+            except Exception:
+                time.sleep(0.5)
+
+    def start_prefetch(self) -> None:
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._prefetch_loop, name="feed_prefetch", daemon=True)
+            self._thread.start()
+
+    def stop_prefetch(self) -> None:
+        self._running = False
+
+
+class _FeedRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # 只连接不发送（如探测守护进程是否存活），无需回复
+            return
+        undo = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be an object")
+        except ValueError as e:
+            resp = {"ok": False, "error": str(e)}
+        else:
+            resp, undo = self.server.feed.handle(request)
+        try:
+            self.wfile.write((json.dumps(resp) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        except OSError:
+            # 客户端已断开（如等待超时），撤销游标移动
+            if undo is not None:
+                undo()
+
+
+class FeedServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, feed: FeedDaemon):
+        self.feed = feed
+        super().__init__(path, _FeedRequestHandler)
+
+    def server_bind(self):
+        super().server_bind()
+        # 只允许当前用户连接
+        os.chmod(self.server_address, 0o600)
+
+
+def _remove_stale_socket(path: str) -> None:
+    """删除上次异常退出遗留的套接字文件；若已有守护进程在监听则报错。"""
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            os.unlink(path)
+            return
+    raise RuntimeError(f"守护进程已在运行: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beauty Tok 共享预取守护进程")
+    parser.add_argument("--ahead", type=int, default=10, help="预取数量（默认 10）")
+    parser.add_argument("--socket", default=FEED_SOCKET_PATH, help="Unix 域套接字路径（播放器端用环境变量 BEAUTY_TOK_FEED_SOCK 指定）")
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("当前平台不支持 Unix 域套接字")
+
+    ensure_socket_dir(args.socket)
+    _remove_stale_socket(args.socket)
+    feed = FeedDaemon(ahead=args.ahead)
+    feed.start_prefetch()
+    with FeedServer(args.socket, feed) as server:
+        print(f"共享预取守护进程已启动: {args.socket}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            feed.stop_prefetch()
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
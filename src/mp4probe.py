@@ -0,0 +1,159 @@
+"""
+MP4 元数据探测
+
+只通过 HTTP Range 请求读取 MP4 的 box 头部（以及 moov），不下载整个文件，
+提取时长、分辨率、码率、文件大小，以及是否为 faststart（moov 在 mdat 之前）。
+"""
+
+import re
+import struct
+from dataclasses import dataclass
+
+import requests
+
+_HEAD_BYTES = 64 * 1024  # 首次读取的字节数，通常已包含 ftyp 与 faststart 文件的 moov
+_MAX_MOOV_BYTES = 4 * 1024 * 1024  # moov 超过该大小时只读开头部分（mvhd 在最前面）
+_MAX_HOPS = 8  # 开头之后最多再逐个读多少个顶层 box 头，避免怪异文件产生大量请求
+_TIMEOUT = 5
+
+
+@dataclass
+class VideoMeta:
+    """视频元数据；无法获知的字段为None。"""
+
+    size: int | None = None  # 字节
+    faststart: bool | None = None
+    duration: float | None = None  # 秒
+    width: int | None = None
+    height: int | None = None
+    bitrate: int | None = None  # bit/s
+
+
+def _read_range(url: str, start: int, length: int, headers: dict) -> tuple[bytes, int | None]:
+    """读取 [start, start+length) 字节，返回 (数据, 文件总大小)。
+    服务器不支持 Range 时，只在 start 为 0 的情况下截取开头，否则抛出 ValueError。
+    """
+    headers = {**headers, "Range": f"bytes={start}-{start + length - 1}"}
+    with requests.get(url, headers=headers, stream=True, timeout=_TIMEOUT) as resp:
+        resp.raise_for_status()
+        total = None
+        if resp.status_code == 206:
+            m = re.search(r"/(\d+)$", resp.headers.get("content-range", ""))
+            if m:
+                total = int(m.group(1))
+        else:
+            if start != 0:
+                raise ValueError("server ignores Range requests")
+            if resp.headers.get("content-length"):
+                total = int(resp.headers["content-length"])
+        data = resp.raw.read(length, decode_content=True)
+    return data, total
+
+
+def _iter_boxes(data: bytes, offset: int = 0, end: int | None = None):
+    """遍历 data[offset:end] 中的 box，产出 (类型, box起点, 内容起点, box大小)。
+    box 大小可能超出 data 范围（如只读到了 mdat 的头部）。
+    """
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[offset : offset + 8])
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack(">Q", data[offset + 8 : offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = None  # 延伸到文件末尾
+        if size is not None and size < header:
+            return
+        yield box_type.decode("latin-1"), offset, offset + header, size
+        if size is None:
+            return
+        offset += size
+
+
+def _parse_moov(moov: bytes, meta: VideoMeta) -> None:
+    """从 moov 内容中解析时长（mvhd）和视频分辨率（第一个宽高非零的 tkhd）。"""
+    for box_type, start, body, size in _iter_boxes(moov):
+        box_end = min(len(moov), start + size) if size else len(moov)
+        if box_type == "mvhd" and meta.duration is None:
+            if moov[body] == 1:
+                timescale, duration = struct.unpack(">IQ", moov[body + 20 : body + 32])
+            else:
+                timescale, duration = struct.unpack(">II", moov[body + 12 : body + 20])
+            if timescale:
+                meta.duration = duration / timescale
+        elif box_type == "trak" and meta.width is None:
+            for child_type, _, child_body, _ in _iter_boxes(moov, body, box_end):
+                if child_type != "tkhd":
+                    continue
+                # 宽高位于 tkhd 末尾，16.16 定点数
+                wh_offset = child_body + (88 if moov[child_body] == 1 else 76)
+                if wh_offset + 8 <= len(moov):
+                    width, height = struct.unpack(">II", moov[wh_offset : wh_offset + 8])
+                    if width and height:
+                        meta.width, meta.height = width >> 16, height >> 16
+                break
+
+
+def probe_mp4(url: str, headers: dict | None = None) -> VideoMeta | None:
+    """探测远程 MP4 的元数据；不是 MP4 或首次请求失败时返回None。
+    之后的请求失败（如服务器不支持 Range）或跳转次数用尽时，返回已知的部分元数据。
+    """
+    headers = headers or {}
+    try:
+        head, total = _read_range(url, 0, _HEAD_BYTES, headers)
+    except (requests.RequestException, ValueError):
+        return None
+    meta = VideoMeta(size=total)
+
+    # 在已读到的开头部分中找顶层 box
+    moov = None  # (box起点, 内容起点, box大小)，均为文件内的绝对偏移
+    offset = 0
+    for box_type, start, body, size in _iter_boxes(head):
+        if start == 0 and box_type != "ftyp":
+            return None
+        if box_type == "moov":
+            moov = (start, body, size)
+            break
+        if box_type == "mdat":
+            meta.faststart = False
+        offset = start + size if size is not None else None
+        if offset is None:
+            break
+
+    try:
+        # 开头没有 moov：每次只读一个 box 头，顺着偏移跳到 moov，最多跳 _MAX_HOPS 次
+        hops = 0
+        while moov is None and offset is not None and total and offset + 8 <= total and hops < _MAX_HOPS:
+            hops += 1
+            data, _ = _read_range(url, offset, min(16, total - offset), headers)
+            box_type, _, body, size = next(_iter_boxes(data), (None, 0, 0, None))
+            if box_type == "mdat":
+                meta.faststart = False
+            if box_type is None or size is None:
+                # size 为 0 的 box 延伸到文件末尾，后面不会再有 moov
+                break
+            if box_type == "moov":
+                moov = (offset, offset + body, size)
+            offset += size
+
+        if moov is None:
+            return meta
+        if meta.faststart is None:
+            meta.faststart = True
+
+        start, body, size = moov
+        if size is not None and start + size <= len(head):
+            moov_data = head[body : start + size]
+        else:
+            length = start + size - body if size is not None else _MAX_MOOV_BYTES
+            moov_data, _ = _read_range(url, body, min(length, _MAX_MOOV_BYTES), headers)
+        _parse_moov(moov_data, meta)
+    except (requests.RequestException, ValueError, struct.error, IndexError):
+        pass
+
+    if meta.duration and meta.size:
+        meta.bitrate = int(meta.size * 8 / meta.duration)
+    return meta
@@ -0,0 +1,75 @@
+"""
+视频接口与预取排序
+
+播放器（api.py）和共享预取守护进程（feed_daemon.py）共用的部分：
+从接口获取视频地址，以及按起播快慢决定预取结果在缓存中的位置。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import requests
+
+from mp4probe import VideoMeta
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+}
+
+URLS = [
+    "https://v2.xxapi.cn/api/meinv?return=302",
+    "https://api.jkyai.top/API/jxhssp.php",
+    "https://api.jkyai.top/API/jxbssp.php",
+]
+
+FETCH_TIMEOUT: float = 8.0  # 获取一个视频地址的总时限（秒），包括所有重定向
+_FETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="video_fetch")
+
+_SLOW_BITRATE: int = 8_000_000  # 超过该码率(bit/s)视为起播慢
+_SLOW_SIZE: int = 100 * 1024 * 1024  # 超过该大小视为起播慢
+_MAX_DEFER: int = 3  # 起播慢的视频最多被推后几次
+
+
+def _resolve_video_url(timeout: float) -> str:
+    # 只需要重定向后的地址，stream=True 避免下载视频内容
+    with requests.get(URLS[0], headers=HEADERS, allow_redirects=True, stream=True, timeout=timeout) as resp:
+        return resp.url
+
+
+def fetch_new_video_url(timeout: float = FETCH_TIMEOUT) -> str:
+    """从接口获取一个新的直链播放地址。
+    requests 的 timeout 只限制单次连接/读取，经过重定向可能更久，
+    因此在线程池中执行并限制总时长，超时抛出 TimeoutError。
+    """
+    future = _FETCH_POOL.submit(_resolve_video_url, timeout)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError as e:
+        raise TimeoutError(f"获取视频地址超时（{timeout:g}s）") from e
+
+
+def is_slow_start(meta: VideoMeta | None) -> bool:
+    """是否为起播慢的视频：非 faststart（moov 在末尾），或体积/码率过大。未知时视为不慢。"""
+    if meta is None:
+        return False
+    return meta.faststart is False or (meta.size or 0) > _SLOW_SIZE or (meta.bitrate or 0) > _SLOW_BITRATE
+
+
+def insert_prefetched(
+    cache: list[str], metas: dict[str, VideoMeta], deferred: dict[str, int], url: str, start: int
+) -> None:
+    """把预取到的视频加入缓存（调用方持锁）。
+    起播快的视频排到尾部尚未播放的慢视频之前，即只是把慢视频往后挪，不会预先缓冲它们；
+    每个慢视频最多被推后 _MAX_DEFER 次，避免一直轮不到。start 为尚未播放部分的起点。
+    """
+    pos = len(cache)
+    if not is_slow_start(metas.get(url)):
+        while (
+            pos > start
+            and is_slow_start(metas.get(cache[pos - 1]))
+            and deferred.get(cache[pos - 1], 0) < _MAX_DEFER
+        ):
+            pos -= 1
+        for slow_url in cache[pos:]:
+            deferred[slow_url] = deferred.get(slow_url, 0) + 1
+    cache.insert(pos, url)
@@ -17,9 +17,11 @@ from PyQt6.QtWidgets import (
 )
 
 from api import (
+    FeedDaemonError,
     get_cache_state,
     get_next_video_url,
     get_prev_video_url,
+    get_video_meta,
     refresh_videos,
     start_prefetch,
 )
@@ -135,6 +137,8 @@ class BeautyVideoPlayer(QMainWindow):
         self.current_video_index = 0
         self.video_urls = []
         self.auto_play = False
+        # 当前视频的预探测元数据（用于播放前显示时长）
+        self.current_meta = None
 
         # 下载相关
         self.download_thread = None
@@ -266,7 +270,11 @@ class BeautyVideoPlayer(QMainWindow):
 
     def refresh_all(self):
         """清空缓存并获取一个新视频。"""
-        refresh_videos()
+        try:
+            refresh_videos()
+        except FeedDaemonError as e:
+            self.show_message("刷新失败", str(e), level="error")
+            return
         self.video_urls = []
         self.current_video_index = -1
         self.load_video()
@@ -317,7 +325,7 @@ class BeautyVideoPlayer(QMainWindow):
                 self.video_urls = self.video_urls[: self.current_video_index + 1]
                 self.video_urls.append(video_url)
                 self.current_video_index = len(self.video_urls) - 1
-                self.media_player.setSource(QUrl(video_url))
+                self.set_video_source(video_url)
                 cur, total = get_cache_state()
                 # 新视频自动播放
                 self.media_player.play()
@@ -329,6 +337,12 @@ class BeautyVideoPlayer(QMainWindow):
         except Exception as e:
             self.show_message("加载视频时出错", f"加载视频时出错: {str(e)}", level="error")
 
+    def set_video_source(self, url):
+        """设置播放源；若预取时已探测到时长，在开始播放前先显示出来。"""
+        self.media_player.setSource(QUrl(url))
+        self.current_meta = get_video_meta(url)
+        self.update_time_label()
+
     def play_pause(self):
         """播放/暂停切换"""
         if self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
@@ -345,7 +359,11 @@ class BeautyVideoPlayer(QMainWindow):
             self.current_video_index -= 1
             url = self.video_urls[self.current_video_index]
         else:
-            prev = get_prev_video_url()
+            try:
+                prev = get_prev_video_url()
+            except FeedDaemonError as e:
+                self.show_message("获取视频失败", str(e), level="error")
+                return
             if prev is None:
                 return
             # 将此前历史同步到本地列表头部
@@ -359,8 +377,11 @@ class BeautyVideoPlayer(QMainWindow):
         except Exception:
             pass
 
-        self.media_player.setSource(QUrl(url))
-        cur, total = get_cache_state()
+        self.set_video_source(url)
+        try:
+            cur, total = get_cache_state()
+        except FeedDaemonError:
+            pass
         self.media_player.play()
         self.play_button.setText("⏸ 暂停")
 
@@ -376,8 +397,11 @@ class BeautyVideoPlayer(QMainWindow):
             except Exception:
                 pass
 
-            self.media_player.setSource(QUrl(url))
-            cur, total = get_cache_state()
+            self.set_video_source(url)
+            try:
+                cur, total = get_cache_state()
+            except FeedDaemonError:
+                pass
             self.media_player.play()
             self.play_button.setText("⏸ 暂停")
             return
@@ -496,6 +520,8 @@ class BeautyVideoPlayer(QMainWindow):
         """更新时间标签"""
         position = self.media_player.position()
         duration = self.media_player.duration()
+        if duration <= 0 and self.current_meta is not None and self.current_meta.duration:
+            duration = int(self.current_meta.duration * 1000)
 
         position_time = self.format_time(position)
         duration_time = self.format_time(duration)